@@ -13,6 +13,12 @@ DB_NAME = os.getenv("POSTGRES_DB")
 DB_USER = os.getenv("POSTGRES_USER")
 DB_PASS = os.getenv("POSTGRES_PASSWORD")
 
+# Pool de conexiones por proceso: Postgres necesita
+# max_connections >= (DB_POOL_SIZE + DB_MAX_OVERFLOW) * workers
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 25))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 25))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+
 if not all([DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASS]):
     raise RuntimeError("Faltan variables de entorno para conectar a PostgreSQL")
 
@@ -26,8 +32,9 @@ engine = create_async_engine(
     DATABASE_URL,
     echo=False,                 # ponelo True si querés ver SQL en consola
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_recycle=DB_POOL_RECYCLE,   # recicla conexiones viejas (segundos)
 )
 
 AsyncSessionLocal = sessionmaker(
@@ -1,6 +1,10 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app import rabbitmq
+
 from app.routes.patient_appointments import router as patient_appointments_router
 from app.routes.patient_studies import router as patient_studies_router
 from app.routes.patient_medication import router as patient_medications_router
@@ -9,7 +13,17 @@ from app.routes.patient_messages import router as patient_messages_router
 from app.routes.patient_dashboard import router as patient_dashboard_router
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Conexión persistente a RabbitMQ reutilizada por todos los requests.
+    # Si el broker todavía no responde, la API arranca igual y se conecta
+    # en el primer publish().
+    await rabbitmq.connect()
+    yield
+    await rabbitmq.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS
 app.add_middleware(
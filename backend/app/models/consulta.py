@@ -29,7 +29,8 @@ class Consulta(Base):
         Index("idx_consulta_medico", "medico_id"),
         Index("idx_consulta_paciente", "paciente_id"),
         Index("idx_consulta_fecha", "fecha_hora"),
-        Index("idx_consulta_estado", "estado"),
+        # Listado de turnos disponibles: filtra por estado y ordena por fecha
+        Index("idx_consulta_estado_fecha", "estado", "fecha_hora"),
     )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
@@ -0,0 +1,97 @@
+# app/rabbitmq.py
+from __future__ import annotations
+import asyncio
+import os
+
+import aio_pika
+import orjson
+from aio_pika.abc import AbstractChannel, AbstractRobustConnection
+from aio_pika.pool import Pool
+
+RABBIT_HOST = os.getenv("RABBIT_HOST", "rabbitmq")
+RABBIT_QUEUE = os.getenv("RABBIT_QUEUE", "notifications")
+RABBIT_CHANNEL_POOL_SIZE = int(os.getenv("RABBIT_CHANNEL_POOL_SIZE", 16))
+
+# Una sola conexión TCP/AMQP por proceso; los canales se reutilizan desde el pool
+connection: AbstractRobustConnection | None = None
+channel_pool: Pool[AbstractChannel] | None = None
+
+# Publicaciones en curso: referencia fuerte para que el GC no las corte a mitad
+_pending: set[asyncio.Task] = set()
+
+
+# Evita que varios publish() concurrentes abran conexiones en paralelo
+_connect_lock = asyncio.Lock()
+
+
+async def connect() -> bool:
+    """Abre la conexión persistente y declara la cola una única vez.
+
+    Si RabbitMQ no está disponible no es fatal: se loguea y se reintenta en
+    el próximo publish(), así una caída del broker solo afecta notificaciones.
+    """
+    global connection, channel_pool
+
+    async with _connect_lock:
+        if channel_pool is not None:
+            return True
+
+        new_connection = None
+        try:
+            new_connection = await aio_pika.connect_robust(host=RABBIT_HOST)
+            new_pool = Pool(new_connection.channel, max_size=RABBIT_CHANNEL_POOL_SIZE)
+
+            async with new_pool.acquire() as channel:
+                await channel.declare_queue(RABBIT_QUEUE, durable=True)
+        except Exception as e:
+            print("No se pudo conectar a RabbitMQ:", e)
+            if new_connection is not None:
+                await new_connection.close()
+            return False
+
+        connection, channel_pool = new_connection, new_pool
+        return True
+
+
+async def close() -> None:
+    """Cierra el pool de canales y la conexión (shutdown)."""
+    global connection, channel_pool
+
+    # Drena las publicaciones pendientes antes de cerrar los canales
+    if _pending:
+        await asyncio.gather(*_pending, return_exceptions=True)
+
+    if channel_pool is not None:
+        await channel_pool.close()
+        channel_pool = None
+    if connection is not None:
+        await connection.close()
+        connection = None
+
+
+async def publish(message: dict) -> None:
+    if channel_pool is None and not await connect():
+        raise RuntimeError("RabbitMQ no está disponible")
+
+    async with channel_pool.acquire() as channel:
+        await channel.default_exchange.publish(
+            aio_pika.Message(
+                body=orjson.dumps(message),
+                content_type="application/json",
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            ),
+            routing_key=RABBIT_QUEUE,
+        )
+
+
+def _on_publish_done(task: asyncio.Task) -> None:
+    _pending.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print("Error publicando en RabbitMQ:", task.exception())
+
+
+def publish_in_background(message: dict) -> None:
+    """Agenda publish() en el event loop sin esperar la confirmación del broker."""
+    task = asyncio.create_task(publish(message))
+    _pending.add(task)
+    task.add_done_callback(_on_publish_done)
@@ -3,20 +3,15 @@ from __future__ import annotations
 from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from pydantic import BaseModel
-from sqlalchemy import select, and_
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
-
-import pika
-import json
-import os
-
-from starlette.concurrency import run_in_threadpool
-from fastapi import BackgroundTasks
+from sqlalchemy.orm import aliased
 
 from app.db import get_session
+from app.rabbitmq import publish_in_background
 from app.models import Consulta, Medico, Paciente, Sucursal, Usuario
 
 router = APIRouter(prefix="/api/patient", tags=["Paciente - Appointments"])
@@ -26,7 +21,10 @@ router = APIRouter(prefix="/api/patient", tags=["Paciente - Appointments"])
 # SCHEMAS
 # =====================
 
-class AppointmentBase(BaseModel):
+# Los listados devuelven dicts planos: TypedDict documenta la forma
+# (OpenAPI) sin el costo de construir un BaseModel por fila
+
+class AppointmentItem(TypedDict):
     id: int
     doctor: str
     specialty: Optional[str]
@@ -36,7 +34,7 @@ class AppointmentBase(BaseModel):
     status: str
 
 
-class AvailableSlot(BaseModel):
+class AvailableItem(TypedDict):
     id: int
     datetime: datetime
     branch: str
@@ -45,141 +43,182 @@ class AvailableSlot(BaseModel):
     specialty: Optional[str]
 
 
+# Página de resultados: next_offset es None cuando no quedan más filas
+class AppointmentPage(TypedDict):
+    items: List[AppointmentItem]
+    next_offset: Optional[int]
+
+
+class AvailablePage(TypedDict):
+    items: List[AvailableItem]
+    next_offset: Optional[int]
+
+
 class ReserveAppointmentRequest(BaseModel):
     consulta_id: int
 
 
+# Serializadores armados una vez: dump_json va directo a bytes (pydantic-core),
+# sin jsonable_encoder ni revalidar cada fila
+_appointments_adapter = TypeAdapter(AppointmentPage)
+_available_adapter = TypeAdapter(AvailablePage)
+
+# Tamaño de página de los listados (por defecto / máximo)
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
 # =====================
 # HELPERS
 # =====================
 
-async def _get_paciente_or_404(session: AsyncSession, paciente_id: int) -> Paciente:
+async def _paciente_exists(session: AsyncSession, paciente_id: int) -> bool:
     result = await session.execute(
-        select(Paciente)
-        .options(selectinload(Paciente.usuario))
-        .where(
+        select(Paciente.usuario_id).where(
             Paciente.usuario_id == paciente_id,
             Paciente.is_activo.is_(True)
         )
     )
-    paciente = result.scalar_one_or_none()
-    if not paciente:
-        raise HTTPException(status_code=404, detail="Paciente no encontrado")
-    return paciente
+    return result.scalar_one_or_none() is not None
 
 
+async def _consulta_exists(session: AsyncSession, consulta_id: int) -> bool:
+    result = await session.execute(
+        select(Consulta.id).where(Consulta.id == consulta_id)
+    )
+    return result.scalar_one_or_none() is not None
 
-# =====================
-# ENDPOINTS
-# =====================
 
-def send_rabbitmq_message(message: dict):
-    rabbit_host = os.getenv("RABBIT_HOST", "rabbitmq")
-    rabbit_queue = os.getenv("RABBIT_QUEUE", "notifications")
+def _next_offset(offset: int, limit: int, count: int) -> Optional[int]:
+    # Página completa: puede haber más filas a partir de offset + limit
+    return offset + count if count == limit else None
 
-    connection = pika.BlockingConnection(
-        pika.ConnectionParameters(host=rabbit_host)
-    )
-    channel = connection.channel()
-    channel.queue_declare(queue=rabbit_queue, durable=True)
-
-    channel.basic_publish(
-        exchange="",
-        routing_key=rabbit_queue,
-        body=json.dumps(message),
-        properties=pika.BasicProperties(delivery_mode=2)
+
+# Usuario del paciente (el JOIN con Usuario sin alias es el del médico)
+_PacienteUsuario = aliased(Usuario, name="paciente_usuario")
+
+# "Nombre Apellido" del médico armado en Postgres (nombre || ' ' || apellido)
+_DOCTOR_NAME = (Usuario.nombre + " " + Usuario.apellido).label("doctor")
+
+# Solo las columnas que usan los listados: un único SELECT con JOINs,
+# sin hidratar Consulta/Medico/Usuario/Sucursal por fila
+_APPOINTMENTS_STMT = (
+    select(
+        Consulta.id,
+        Consulta.especialidad,
+        Consulta.fecha_hora,
+        Consulta.sala,
+        Sucursal.nombre.label("branch"),
+        _DOCTOR_NAME,
     )
+    .join(Consulta.sucursal)
+    .join(Consulta.medico)
+    .join(Medico.usuario)
+    .order_by(Consulta.fecha_hora, Consulta.id)  # orden estable para paginar
+)
+
+# Base de /appointments/available, armada una sola vez al importar el módulo.
+# Cada request solo le agrega los filtros opcionales; SQLAlchemy cachea el SQL
+# compilado por "forma" de la consulta, así que no se recompila en cada llamada.
+# Usa el índice idx_consulta_estado_fecha (estado, fecha_hora).
+_AVAILABLE_STMT = _APPOINTMENTS_STMT.where(
+    Consulta.estado == "disponible",
+    Consulta.paciente_id.is_(None),
+)
+
 
-    connection.close()
+# =====================
+# ENDPOINTS
+# =====================
 
-@router.get("/{paciente_id}/appointments/upcoming", response_model=List[AppointmentBase])
+@router.get(
+    "/{paciente_id}/appointments/upcoming",
+    responses={200: {"model": AppointmentPage}},
+)
 async def get_upcoming(
     paciente_id: int,
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
     session: AsyncSession = Depends(get_session),
 ):
-    await _get_paciente_or_404(session, paciente_id)
+    if not await _paciente_exists(session, paciente_id):
+        raise HTTPException(status_code=404, detail="Paciente no encontrado")
     now = datetime.utcnow()
 
     stmt = (
-        select(Consulta)
-        .options(
-            selectinload(Consulta.medico).selectinload(Medico.usuario),
-            selectinload(Consulta.sucursal),
-        )
+        _APPOINTMENTS_STMT
         .where(
             Consulta.paciente_id == paciente_id,
             Consulta.fecha_hora >= now,
             Consulta.estado == "reservado",
         )
-        .order_by(Consulta.fecha_hora)
+        .limit(limit)
+        .offset(offset)
     )
 
     result = await session.execute(stmt)
-    consultas = result.scalars().all()
-
-    resp = []
-    for c in consultas:
-        resp.append(AppointmentBase(
-            id=c.id,
-            doctor=f"{c.medico.usuario.nombre} {c.medico.usuario.apellido}",
-            specialty=c.especialidad,
-            datetime=c.fecha_hora,
-            branch=c.sucursal.nombre,
-            room=c.sala,
-            status="confirmed",
-        ))
-    return resp
-
-
-@router.get("/appointments/available", response_model=List[AvailableSlot])
+
+    # Los datos ya vienen tipados desde la DB: se arman los dicts sin revalidar
+    items = [
+        {
+            "id": r.id,
+            "doctor": r.doctor,
+            "specialty": r.especialidad,
+            "datetime": r.fecha_hora,
+            "branch": r.branch,
+            "room": r.sala,
+            "status": "confirmed",
+        }
+        for r in result.all()
+    ]
+    page = {"items": items, "next_offset": _next_offset(offset, limit, len(items))}
+    return Response(_appointments_adapter.dump_json(page), media_type="application/json")
+
+
+@router.get(
+    "/appointments/available",
+    responses={200: {"model": AvailablePage}},
+)
 async def get_available(
     especialidad: Optional[str] = Query(None),
     medico_id: Optional[int] = Query(None),
     sucursal_id: Optional[int] = Query(None),
     desde: Optional[datetime] = Query(None),
     hasta: Optional[datetime] = Query(None),
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
     session: AsyncSession = Depends(get_session),
 ):
-    conditions = [
-        Consulta.estado == "disponible",
-        Consulta.paciente_id.is_(None)
-    ]
+    stmt = _AVAILABLE_STMT
 
     if especialidad:
-        conditions.append(Consulta.especialidad.ilike(f"%{especialidad}%"))
+        stmt = stmt.where(Consulta.especialidad.ilike(f"%{especialidad}%"))
     if medico_id:
-        conditions.append(Consulta.medico_id == medico_id)
+        stmt = stmt.where(Consulta.medico_id == medico_id)
     if sucursal_id:
-        conditions.append(Consulta.sucursal_id == sucursal_id)
+        stmt = stmt.where(Consulta.sucursal_id == sucursal_id)
     if desde:
-        conditions.append(Consulta.fecha_hora >= desde)
+        stmt = stmt.where(Consulta.fecha_hora >= desde)
     if hasta:
-        conditions.append(Consulta.fecha_hora <= hasta)
+        stmt = stmt.where(Consulta.fecha_hora <= hasta)
 
-    stmt = (
-        select(Consulta)
-        .options(
-            selectinload(Consulta.medico).selectinload(Medico.usuario),
-            selectinload(Consulta.sucursal),
-        )
-        .where(and_(*conditions))
-        .order_by(Consulta.fecha_hora)
-    )
+    stmt = stmt.limit(limit).offset(offset)
 
     result = await session.execute(stmt)
-    consultas = result.scalars().all()
 
-    resp = []
-    for c in consultas:
-        resp.append(AvailableSlot(
-            id=c.id,
-            datetime=c.fecha_hora,
-            branch=c.sucursal.nombre,
-            room=c.sala,
-            doctor=f"{c.medico.usuario.nombre} {c.medico.usuario.apellido}",
-            specialty=c.especialidad,
-        ))
-    return resp
+    items = [
+        {
+            "id": r.id,
+            "datetime": r.fecha_hora,
+            "branch": r.branch,
+            "room": r.sala,
+            "doctor": r.doctor,
+            "specialty": r.especialidad,
+        }
+        for r in result.all()
+    ]
+    page = {"items": items, "next_offset": _next_offset(offset, limit, len(items))}
+    return Response(_available_adapter.dump_json(page), media_type="application/json")
 
 
 # ==============================================
@@ -189,48 +228,64 @@ async def get_available(
 async def reserve(
     paciente_id: int,
     body: ReserveAppointmentRequest,
-    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_session),
 ):
-    paciente = await _get_paciente_or_404(session, paciente_id)
-
+    # Reserva atómica: el UPDATE solo afecta la fila si sigue disponible y el
+    # paciente existe y está activo, sin SELECT previo ni SELECT ... FOR UPDATE.
+    # Sucursal, médico (consulta.medico_id es el usuario_id del médico) y el
+    # email del paciente se resuelven con UPDATE ... FROM y vuelven en el
+    # RETURNING para armar la notificación.
     stmt = (
-        select(Consulta)
-        .options(
-            selectinload(Consulta.medico).selectinload(Medico.usuario),
-            selectinload(Consulta.sucursal),
+        update(Consulta)
+        .where(
+            Consulta.id == body.consulta_id,
+            Consulta.estado == "disponible",
+            Consulta.paciente_id.is_(None),
+            Consulta.sucursal_id == Sucursal.id,
+            Consulta.medico_id == Usuario.id,
+            Paciente.usuario_id == paciente_id,
+            Paciente.is_activo.is_(True),
+            _PacienteUsuario.id == Paciente.usuario_id,
+        )
+        .values(paciente_id=paciente_id, estado="reservado")
+        .returning(
+            Consulta.id,
+            Consulta.especialidad,
+            Consulta.fecha_hora,
+            Sucursal.nombre.label("branch"),
+            _DOCTOR_NAME,
+            _PacienteUsuario.email,
         )
-        .where(Consulta.id == body.consulta_id)
-        .with_for_update()
+        .execution_options(synchronize_session=False)
     )
 
     result = await session.execute(stmt)
-    consulta = result.scalar_one_or_none()
+    consulta = result.one_or_none()
 
     if not consulta:
-        raise HTTPException(status_code=404, detail="Consulta no encontrada")
-
-    if consulta.estado != "disponible" or consulta.paciente_id is not None:
+        # Solo en el camino de error se averigua el motivo
+        if not await _paciente_exists(session, paciente_id):
+            raise HTTPException(status_code=404, detail="Paciente no encontrado")
+        if not await _consulta_exists(session, body.consulta_id):
+            raise HTTPException(status_code=404, detail="Consulta no encontrada")
         raise HTTPException(status_code=409, detail="La consulta ya no está disponible")
 
-    consulta.paciente_id = paciente_id
-    consulta.estado = "reservado"
-
     await session.commit()
 
     notification = {
         "type": "appointment_reserved",
         "paciente_id": paciente_id,
         "consulta_id": consulta.id,
-        "doctor": f"{consulta.medico.usuario.nombre} {consulta.medico.usuario.apellido}",
+        "doctor": consulta.doctor,
         "specialty": consulta.especialidad,
-        "datetime": str(consulta.fecha_hora),
-        "branch": consulta.sucursal.nombre,
-        "email": paciente.usuario.email if paciente.usuario else None
+        "datetime": consulta.fecha_hora,  # orjson lo serializa en ISO-8601
+        "branch": consulta.branch,
+        "email": consulta.email,
     }
 
-    #ESTO SÍ FUNCIONA — Sin bloquear el async
-    background_tasks.add_task(send_rabbitmq_message, notification)
+    # Se publica en segundo plano sobre un canal del pool: la respuesta
+    # no espera a RabbitMQ
+    publish_in_background(notification)
 
     return {"message": "Turno reservado", "consulta_id": consulta.id}
 
@@ -241,24 +296,27 @@ async def cancel(
     consulta_id: int,
     session: AsyncSession = Depends(get_session),
 ):
-    await _get_paciente_or_404(session, paciente_id)
-
+    # Un solo UPDATE valida que el paciente esté activo y que la consulta sea suya
     stmt = (
-        select(Consulta)
-        .where(Consulta.id == consulta_id)
-        .with_for_update()
+        update(Consulta)
+        .where(
+            Consulta.id == consulta_id,
+            Consulta.paciente_id == paciente_id,
+            Paciente.usuario_id == Consulta.paciente_id,
+            Paciente.is_activo.is_(True),
+        )
+        .values(paciente_id=None, estado="disponible")
+        .returning(Consulta.id)
+        .execution_options(synchronize_session=False)
     )
     result = await session.execute(stmt)
-    consulta = result.scalar_one_or_none()
 
-    if not consulta:
-        raise HTTPException(status_code=404, detail="Consulta no encontrada")
-
-    if consulta.paciente_id != paciente_id:
+    if result.scalar_one_or_none() is None:
+        if not await _paciente_exists(session, paciente_id):
+            raise HTTPException(status_code=404, detail="Paciente no encontrado")
+        if not await _consulta_exists(session, consulta_id):
+            raise HTTPException(status_code=404, detail="Consulta no encontrada")
         raise HTTPException(status_code=403, detail="No podés cancelar este turno")
 
-    consulta.paciente_id = None
-    consulta.estado = "disponible"
-
     await session.commit()
     return {"message": "Turno cancelado correctamente"}
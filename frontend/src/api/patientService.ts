@@ -1,10 +1,18 @@
 import { api } from "./http";
 
 /* ----------------------------
-   1) GET appointments disponibles
+   1) GET appointments disponibles (paginado)
+   Devuelve { items, next_offset }; next_offset es null en la última página
 -----------------------------*/
-export const getAvailableAppointments = async () => {
-  const res = await api.get("/patient/appointments/available");
+export const AVAILABLE_PAGE_SIZE = 50;
+
+export const getAvailableAppointments = async (
+  offset = 0,
+  limit = AVAILABLE_PAGE_SIZE
+) => {
+  const res = await api.get("/patient/appointments/available", {
+    params: { offset, limit },
+  });
   return res.data;
 };
 
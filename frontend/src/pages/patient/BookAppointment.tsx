@@ -12,6 +12,7 @@ import {
 import { Avatar, AvatarFallback, AvatarImage } from "@/components/ui/avatar";
 
 import { 
+  AVAILABLE_PAGE_SIZE,
   getAvailableAppointments, 
   reserveAppointment 
 } from "@/api/patientService";
@@ -23,6 +24,10 @@ const BookAppointment = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
+  // Paginación: offset de la página actual y el de la siguiente (null = última)
+  const [offset, setOffset] = useState(0);
+  const [nextOffset, setNextOffset] = useState<number | null>(null);
+
   const [timeOfDay, setTimeOfDay] = useState<string[]>(["afternoon"]);
 
   const toggleTimeOfDay = (period: string) => {
@@ -36,11 +41,11 @@ const BookAppointment = () => {
   // =============================
   // Cargar turnos disponibles
   // =============================
-  const loadAppointments = async () => {
+  const loadAppointments = async (pageOffset = offset) => {
     try {
-      const res = await getAvailableAppointments();
+      const res = await getAvailableAppointments(pageOffset);
 
-      const formatted = res.map((item: any) => {
+      const formatted = res.items.map((item: any) => {
         const dateObj = new Date(item.datetime);
 
         return {
@@ -62,6 +67,8 @@ const BookAppointment = () => {
       });
 
       setAppointments(formatted);
+      setOffset(pageOffset);
+      setNextOffset(res.next_offset);
     } catch (err) {
       console.error(err);
       setError("Error loading available appointments");
@@ -71,7 +78,7 @@ const BookAppointment = () => {
   };
 
   useEffect(() => {
-    loadAppointments();
+    loadAppointments(0);
   }, []);
 
   // =============================
@@ -84,7 +91,7 @@ const BookAppointment = () => {
 
       alert("Reserva realizada correctamente ✔️");
 
-      // Volver a cargar turnos
+      // Volver a cargar la página actual
       loadAppointments();
     } catch (err) {
       console.error(err);
@@ -206,14 +213,28 @@ const BookAppointment = () => {
           <div className="flex items-center justify-between mb-6">
             <p className="text-foreground">
               Showing{" "}
-              <span className="font-semibold">{appointments.length} appointments</span>
+              <span className="font-semibold">
+                {appointments.length === 0
+                  ? "0 appointments"
+                  : `${offset + 1}–${offset + appointments.length} appointments`}
+              </span>
             </p>
 
             <div className="flex items-center gap-2">
-              <Button variant="outline" size="icon">
+              <Button
+                variant="outline"
+                size="icon"
+                disabled={offset === 0}
+                onClick={() => loadAppointments(Math.max(0, offset - AVAILABLE_PAGE_SIZE))}
+              >
                 <ChevronLeft className="h-4 w-4" />
               </Button>
-              <Button variant="outline" size="icon">
+              <Button
+                variant="outline"
+                size="icon"
+                disabled={nextOffset === null}
+                onClick={() => nextOffset !== null && loadAppointments(nextOffset)}
+              >
                 <ChevronRight className="h-4 w-4" />
               </Button>
             </div>
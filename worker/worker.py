@@ -1,19 +1,63 @@
-import pika, os, time, json, smtplib
+import asyncio, os
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+import aio_pika
+import aiosmtplib
+import orjson
+
 
 RABBIT_HOST = os.getenv("RABBIT_HOST", "rabbitmq")
 QUEUE_NAME = os.getenv("RABBIT_QUEUE", "notifications")
+# Reintentos con demora (TTL por mensaje -> vuelven a QUEUE_NAME al expirar)
+RETRY_QUEUE = f"{QUEUE_NAME}.retry"
+# Mensajes que no se pueden entregar nunca o agotaron los reintentos
+DEAD_QUEUE = f"{QUEUE_NAME}.dead"
+
+# Lote máximo de mensajes y espera máxima (segundos) antes de procesarlo
+BATCH_SIZE = int(os.getenv("WORKER_BATCH_SIZE", 32))
+BATCH_TIMEOUT = float(os.getenv("WORKER_BATCH_TIMEOUT", 0.5))
+
+# Backoff (segundos) de cada mensaje fallido: se duplica por intento hasta el máximo
+RETRY_DELAY = float(os.getenv("WORKER_RETRY_DELAY", 1))
+RETRY_MAX_DELAY = float(os.getenv("WORKER_RETRY_MAX_DELAY", 60))
+# Intentos fallidos transitorios antes de mandar el mensaje a DEAD_QUEUE
+MAX_RETRIES = int(os.getenv("WORKER_MAX_RETRIES", 10))
 
 SMTP_HOST = os.getenv("SMTP_HOST")
 SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
 SMTP_USER = os.getenv("SMTP_USER")
 SMTP_PASS = os.getenv("SMTP_PASS")
+# Envíos SMTP simultáneos (= sesiones abiertas como máximo)
+SMTP_CONCURRENCY = int(os.getenv("SMTP_CONCURRENCY", 16))
+
+# Sesiones SMTP ya autenticadas y libres; cada envío toma una y la devuelve
+_smtp_idle = []
+_smtp_slots = asyncio.Semaphore(SMTP_CONCURRENCY)
+
 
+async def _connect_smtp():
+    smtp = aiosmtplib.SMTP(
+        hostname=SMTP_HOST,
+        port=SMTP_PORT,
+        username=SMTP_USER,
+        password=SMTP_PASS,
+        start_tls=True,
+    )
+    await smtp.connect()  # STARTTLS + login
+    return smtp
 
-def send_email(to_email, subject, html_body):
-    """Envía email SMTP usando Gmail"""
+
+async def _acquire_smtp():
+    while _smtp_idle:
+        smtp = _smtp_idle.pop()
+        if smtp.is_connected:
+            return smtp
+    return await _connect_smtp()
+
+
+async def send_email(to_email, subject, html_body):
+    """Envía email SMTP usando Gmail, reutilizando las sesiones abiertas"""
     msg = MIMEMultipart()
     msg["From"] = SMTP_USER
     msg["To"] = to_email
@@ -21,14 +65,23 @@ def send_email(to_email, subject, html_body):
 
     msg.attach(MIMEText(html_body, "html"))
 
-    with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-        server.starttls()
-        server.login(SMTP_USER, SMTP_PASS)
-        server.sendmail(SMTP_USER, to_email, msg.as_string())
+    async with _smtp_slots:
+        smtp = await _acquire_smtp()
+        try:
+            try:
+                await smtp.send_message(msg)
+            except aiosmtplib.SMTPServerDisconnected:
+                # El servidor cortó la sesión (timeout, etc.): reconectar y reintentar una vez
+                smtp = await _connect_smtp()
+                await smtp.send_message(msg)
+        except Exception:
+            smtp.close()
+            raise
+        _smtp_idle.append(smtp)
 
 
-def process_notification(body):
-    data = json.loads(body)
+async def process_notification(body):
+    data = orjson.loads(body)
 
     if data["type"] == "appointment_reserved":
         paciente_email = data["email"]
@@ -50,38 +103,130 @@ def process_notification(body):
         """
 
         print(f"Enviando email a {paciente_email}...")
-        send_email(paciente_email, subject, html)
+        await send_email(paciente_email, subject, html)
         print("Email enviado correctamente.")
 
 
-def main():
+async def _next_batch(inbox):
+    """Espera un mensaje y junta los que lleguen hasta BATCH_SIZE o BATCH_TIMEOUT"""
+    loop = asyncio.get_running_loop()
+    batch = [await inbox.get()]
+    deadline = loop.time() + BATCH_TIMEOUT
+
+    while len(batch) < BATCH_SIZE:
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(inbox.get(), timeout))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+
+def _is_permanent(error):
+    """Errores que no se arreglan reintentando: mensaje inválido o destinatario rechazado"""
+    if isinstance(error, (orjson.JSONDecodeError, KeyError, aiosmtplib.SMTPRecipientsRefused)):
+        return True
+    return isinstance(error, aiosmtplib.SMTPResponseException) and 500 <= error.code < 600
+
+
+def _republish(message, headers, expiration=None):
+    return aio_pika.Message(
+        body=message.body,
+        headers=headers,
+        content_type=message.content_type,
+        delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+        expiration=expiration,
+    )
+
+
+async def _handle_failure(channel, message, error):
+    """Manda el mensaje fallido a la cola de reintentos o a la de descartados"""
+    headers = dict(message.headers or {})
+    retries = int(headers.get("x-retries", 0))
+
+    if _is_permanent(error) or retries >= MAX_RETRIES:
+        print(f"Mensaje descartado a {DEAD_QUEUE}:", error)
+        headers["x-error"] = repr(error)[:500]
+        await channel.default_exchange.publish(
+            _republish(message, headers), routing_key=DEAD_QUEUE
+        )
+        return
+
+    # Backoff propio del mensaje: espera en RETRY_QUEUE sin frenar al resto
+    delay = min(RETRY_DELAY * 2 ** retries, RETRY_MAX_DELAY)
+    print(f"Error procesando mensaje (intento {retries + 1}), reintento en {delay:g}s:", error)
+    headers["x-retries"] = retries + 1
+    await channel.default_exchange.publish(
+        _republish(message, headers, expiration=delay), routing_key=RETRY_QUEUE
+    )
+
+
+async def consume(channel, queue):
+    inbox = asyncio.Queue()
+    await queue.consume(inbox.put)
+    outage_delay = RETRY_DELAY
+
+    while True:
+        batch = await _next_batch(inbox)
+        for message in batch:
+            print("Mensaje recibido:", message.body.decode())
+
+        # Todos los envíos del lote en paralelo (acotados por _smtp_slots)
+        results = await asyncio.gather(
+            *(process_notification(message.body) for message in batch),
+            return_exceptions=True,
+        )
+
+        # Los fallidos se republican (confirmado por el broker) antes del ack,
+        # así ningún mensaje se pierde y el lote entero se puede confirmar
+        for message, result in zip(batch, results):
+            if isinstance(result, Exception):
+                await _handle_failure(channel, message, result)
+
+        # Un solo frame AMQP confirma todo el lote
+        await batch[-1].ack(multiple=True)
+
+        # Pausa global solo si fallaron transitoriamente todos los envíos
+        # (p. ej. SMTP caído): no tiene sentido seguir quemando reintentos
+        if all(isinstance(r, Exception) and not _is_permanent(r) for r in results):
+            print(f"Todos los envíos fallaron, pausando {outage_delay:g}s...")
+            await asyncio.sleep(outage_delay)
+            outage_delay = min(outage_delay * 2, RETRY_MAX_DELAY)
+        else:
+            outage_delay = RETRY_DELAY
+
+
+async def main():
     while True:
         try:
             print("Conectando a RabbitMQ...")
-            connection = pika.BlockingConnection(
-                pika.ConnectionParameters(host=RABBIT_HOST)
-            )
-            channel = connection.channel()
-            channel.queue_declare(queue=QUEUE_NAME, durable=True)
-
-            print("Worker escuchando la cola:", QUEUE_NAME)
-
-            def callback(ch, method, properties, body):
-                print("Mensaje recibido:", body.decode())
-                process_notification(body.decode())
-                ch.basic_ack(delivery_tag=method.delivery_tag)
-
-            channel.basic_consume(
-                queue=QUEUE_NAME,
-                on_message_callback=callback
-            )
-
-            channel.start_consuming()
+            connection = await aio_pika.connect_robust(host=RABBIT_HOST)
+
+            async with connection:
+                channel = await connection.channel()
+                # Ventana de mensajes sin ack que RabbitMQ nos entrega a la vez
+                await channel.set_qos(prefetch_count=BATCH_SIZE)
+                queue = await channel.declare_queue(QUEUE_NAME, durable=True)
+                # Al vencer su TTL, los mensajes de RETRY_QUEUE vuelven a QUEUE_NAME
+                await channel.declare_queue(
+                    RETRY_QUEUE,
+                    durable=True,
+                    arguments={
+                        "x-dead-letter-exchange": "",
+                        "x-dead-letter-routing-key": QUEUE_NAME,
+                    },
+                )
+                await channel.declare_queue(DEAD_QUEUE, durable=True)
+
+                print("Worker escuchando la cola:", QUEUE_NAME)
+                await consume(channel, queue)
 
         except Exception as e:
             print("Error en worker:", e)
-            time.sleep(3)
+            await asyncio.sleep(3)
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())